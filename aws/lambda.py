@@ -1,23 +1,72 @@
+import io
 import os
 import sys
+import gzip
 import json
+import fcntl
+import select
+import time
+import hashlib
 import shutil
 import zipfile
 import tempfile
+import threading
 import subprocess
 import urllib.parse
-import urllib.request
 
 import boto3
+import urllib3
 
-from typing import Any, Dict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 AWS_REGION = "ap-south-1"
 S3_BUCKET = "superbox-mcp-registry"
+MCP_CACHE_DIR = "/tmp/mcp_cache"
+PIP_MODULES_DIR = "/tmp/pip_modules"
+TMP_LIMIT_BYTES = 400 * 1024 * 1024
+REPO_CACHE_TTL_SECONDS = 600
+MAX_CONNECTIONS = 1024
+UV_BINARY = shutil.which("uv")
+PIPE_SIZE = 1 << 20
+PIPE_READ_SIZE = 65536
+BATCH_MAX_BYTES = 96 * 1024
+META_TTL_SECONDS = 300
+META_CACHE_SIZE = 256
+EXTRACT_WORKERS = 4
+EXTRACT_SKIP_DIRS = frozenset({".git", ".github", "tests", "node_modules"})
+COMPRESS_MIN_BYTES = 1024
+
+INIT_MESSAGE = (
+    json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-11-25",
+                "capabilities": {},
+                "clientInfo": {"name": "superbox", "version": "1.0.0"},
+            },
+        }
+    )
+    + "\n"
+).encode("utf-8")
+INITIALIZED_NOTIFICATION = (
+    json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + "\n"
+).encode("utf-8")
 
 _mcp_process = None
-_repo_dir = None
-_connection_params = {}
+_work_dir = None
+_connection_params: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+_stdout_buf = bytearray()
+_s3_client = None
+_apigw_clients = {}
+_meta_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_http = urllib3.PoolManager(
+    num_pools=2, maxsize=4, retries=3, timeout=urllib3.Timeout(connect=5.0, read=30.0)
+)
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -47,6 +96,9 @@ def handle_connect(event: Dict[str, Any]) -> Dict[str, Any]:
             return {"statusCode": 400, "body": "Missing 'name' parameter"}
 
         _connection_params[connection_id] = query_params
+        _connection_params.move_to_end(connection_id)
+        if len(_connection_params) > MAX_CONNECTIONS:
+            _connection_params.popitem(last=False)
 
         print(f"Connect: {mcp_name} (connectionId: {connection_id})")
 
@@ -59,38 +111,54 @@ def handle_connect(event: Dict[str, Any]) -> Dict[str, Any]:
 
 def handle_disconnect(event: Dict[str, Any]) -> Dict[str, Any]:
     """Handle WebSocket disconnection and cleanup resources."""
-    global _mcp_process, _repo_dir
+    global _mcp_process, _work_dir
+
+    connection_id = event.get("requestContext", {}).get("connectionId", "")
+    _connection_params.pop(connection_id, None)
 
     if _mcp_process:
         _mcp_process.kill()
         _mcp_process = None
 
-    if _repo_dir and os.path.exists(_repo_dir):
-        shutil.rmtree(os.path.dirname(_repo_dir), ignore_errors=True)
-        _repo_dir = None
+    # Only the per-session working copy goes; the cached repo in MCP_CACHE_DIR stays
+    if _work_dir:
+        shutil.rmtree(os.path.dirname(_work_dir), ignore_errors=True)
+        _work_dir = None
+    evict_cache()
 
     return {"statusCode": 200}
 
 
 def handle_message(event: Dict[str, Any]) -> Dict[str, Any]:
     """Handle incoming WebSocket messages and forward to MCP server."""
-    global _mcp_process, _repo_dir
+    global _mcp_process, _work_dir, _stdout_buf
 
     try:
         body = event.get("body", "")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
 
+        # Only parse when _mcp_name must be stripped, params filled in, or a multi-line
+        # body collapsed onto one stdio line; otherwise the bytes are forwarded untouched
+        needs_params = b'"method"' in body and b'"id"' in body and b'"params"' not in body
+        multi_line = b"\n" in body or b"\r" in body
         mcp_name = None
-        try:
-            message_data = json.loads(body)
-            if "_mcp_name" in message_data:
-                mcp_name = message_data.pop("_mcp_name")
-
-            if "method" in message_data and "params" not in message_data and "id" in message_data:
-                message_data["params"] = {}
-
-            body = json.dumps(message_data)
-        except (json.JSONDecodeError, KeyError):
-            pass
+        if b'"_mcp_name"' in body or needs_params or multi_line:
+            try:
+                message_data = json.loads(body)
+                if "_mcp_name" in message_data:
+                    mcp_name = message_data.pop("_mcp_name")
+
+                if (
+                    "method" in message_data
+                    and "params" not in message_data
+                    and "id" in message_data
+                ):
+                    message_data["params"] = {}
+
+                body = json.dumps(message_data).encode("utf-8")
+            except (json.JSONDecodeError, KeyError):
+                pass
 
         if not _mcp_process or _mcp_process.poll() is not None:
             print("Setting up MCP server...")
@@ -116,49 +184,50 @@ def handle_message(event: Dict[str, Any]) -> Dict[str, Any]:
             else:
                 metadata = fetch_meta(mcp_name)
 
-            _repo_dir = clone_repo(metadata["repository"]["url"], mcp_name)
-            install_deps(_repo_dir)
+            repo_url = metadata["repository"]["url"]
+
+            # Warm pip up while the repo downloads so install_deps does not pay for it
+            prewarm = None
+            if not UV_BINARY and not repo_is_fresh(repo_cache_dir(repo_url, mcp_name)):
+                prewarm = threading.Thread(target=prewarm_pip, daemon=True)
+                prewarm.start()
+
+            repo_dir = clone_repo(repo_url, mcp_name)
+            if prewarm:
+                prewarm.join()
+            pip_target = install_deps(repo_dir)
 
-            _mcp_process = start_server(_repo_dir, metadata["entrypoint"], metadata["lang"])
+            if _work_dir:
+                shutil.rmtree(os.path.dirname(_work_dir), ignore_errors=True)
+            _work_dir = checkout_repo(repo_dir, mcp_name)
+
+            _mcp_process = start_server(
+                _work_dir, metadata["entrypoint"], metadata["lang"], pip_target
+            )
+            _stdout_buf = bytearray()
             print("MCP server ready")
 
-            init_message = {
-                "jsonrpc": "2.0",
-                "id": 0,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2025-11-25",
-                    "capabilities": {},
-                    "clientInfo": {"name": "superbox", "version": "1.0.0"},
-                },
-            }
             print("Auto-initializing MCP server")
-            _mcp_process.stdin.write((json.dumps(init_message) + "\n").encode("utf-8"))
-            _mcp_process.stdin.flush()
+            write_frame(_mcp_process, INIT_MESSAGE)
 
-            init_response_line = _mcp_process.stdout.readline()
-            init_response = init_response_line.decode("utf-8").strip()
+            init_response = read_frame(_mcp_process).decode("utf-8")
             print(f"Init response: {init_response[:200]}")
 
-            notif_message = {"jsonrpc": "2.0", "method": "notifications/initialized"}
-            _mcp_process.stdin.write((json.dumps(notif_message) + "\n").encode("utf-8"))
-            _mcp_process.stdin.flush()
+            write_frame(_mcp_process, INITIALIZED_NOTIFICATION)
             print("MCP server initialized")
 
-        _mcp_process.stdin.write((body + "\n").encode("utf-8"))
-        _mcp_process.stdin.flush()
+        write_frame(_mcp_process, body + b"\n")
 
-        response_line = _mcp_process.stdout.readline()
-        response = response_line.decode("utf-8").strip()
+        lines = read_lines(_mcp_process)
 
         connection_id = event["requestContext"]["connectionId"]
         domain = event["requestContext"]["domainName"]
         stage = event["requestContext"]["stage"]
 
-        endpoint_url = f"https://{domain}/{stage}"
-
-        api_gateway = boto3.client("apigatewaymanagementapi", endpoint_url=endpoint_url)
-        api_gateway.post_to_connection(ConnectionId=connection_id, Data=response.encode("utf-8"))
+        api_gateway = get_apigw(f"https://{domain}/{stage}")
+        for payload in batch_payloads(lines):
+            data = compress_response(connection_id, payload)
+            api_gateway.post_to_connection(ConnectionId=connection_id, Data=data)
 
         return {"statusCode": 200}
 
@@ -173,9 +242,7 @@ def handle_message(event: Dict[str, Any]) -> Dict[str, Any]:
             domain = event["requestContext"]["domainName"]
             stage = event["requestContext"]["stage"]
 
-            api_gateway = boto3.client(
-                "apigatewaymanagementapi", endpoint_url=f"https://{domain}/{stage}"
-            )
+            api_gateway = get_apigw(f"https://{domain}/{stage}")
 
             error_msg = json.dumps({"error": str(e), "type": type(e).__name__})
             api_gateway.post_to_connection(
@@ -187,7 +254,34 @@ def handle_message(event: Dict[str, Any]) -> Dict[str, Any]:
         return {"statusCode": 500, "body": str(e)}
 
 
-def start_server(repo_dir: str, entrypoint: str, lang: str) -> subprocess.Popen:
+def batch_payloads(lines: List[bytes]) -> List[bytes]:
+    """Build the WebSocket payloads for frames read_lines has already capped in size."""
+    frames = [line.strip() for line in lines if line.strip()]
+    if len(frames) <= 1:
+        return frames or [b""]
+
+    # A stray banner or log line on stdout would make the whole envelope invalid JSON,
+    # so only splice frames that look like JSON values and otherwise post them one by one
+    for frame in frames:
+        if frame[:1] not in (b"{", b"[") or frame[-1:] not in (b"}", b"]"):
+            print(f"Non-JSON stdout line, sending frames unbatched: {frame[:200]!r}")
+            return frames
+
+    return [b'{"jsonrpc": "2.0", "batch": [' + b",".join(frames) + b"]}"]
+
+
+def compress_response(connection_id: str, data: bytes) -> bytes:
+    """Gzip large responses for connections that opted in with ?compress=gzip."""
+    query_params = _connection_params.get(connection_id, {})
+    if query_params.get("compress", "").lower() != "gzip" or len(data) <= COMPRESS_MIN_BYTES:
+        return data
+
+    return gzip.compress(data, compresslevel=1)
+
+
+def start_server(
+    repo_dir: str, entrypoint: str, lang: str, pip_target: Optional[str] = None
+) -> subprocess.Popen:
     """Start MCP server as a subprocess."""
     if lang.lower() != "python":
         raise ValueError(f"Unsupported language: {lang}")
@@ -196,13 +290,14 @@ def start_server(repo_dir: str, entrypoint: str, lang: str) -> subprocess.Popen:
     if not os.path.exists(entrypoint_path):
         raise FileNotFoundError(f"Entrypoint not found: {entrypoint}")
 
+    # install_deps only returns a pip target it has already created
     env = os.environ.copy()
-    env["PYTHONPATH"] = f"{repo_dir}:{env.get('PYTHONPATH', '')}"
-
-    pip_target = "/tmp/pip_modules"
-    if os.path.exists(pip_target):
-        env["PYTHONPATH"] = f"{pip_target}:{env['PYTHONPATH']}"
+    pythonpath = f"{repo_dir}:{env.get('PYTHONPATH', '')}"
+    env["PYTHONPATH"] = f"{pip_target}:{pythonpath}" if pip_target else pythonpath
 
+    # On the python3.10+ runtimes Popen spawns via vfork(), so the Lambda heap is not
+    # copied into the child. Passing preexec_fn, user, group or extra_groups would force
+    # a full fork() instead, so keep them out of this call.
     process = subprocess.Popen(
         [sys.executable, entrypoint_path],
         stdin=subprocess.PIPE,
@@ -210,31 +305,205 @@ def start_server(repo_dir: str, entrypoint: str, lang: str) -> subprocess.Popen:
         stderr=subprocess.PIPE,
         cwd=repo_dir,
         env=env,
-        bufsize=1,
+        bufsize=0,
         universal_newlines=False,
     )
 
+    # Larger pipes let big tool responses land in a few reads instead of many 64 KiB ones
+    for pipe in (process.stdin, process.stdout):
+        try:
+            fcntl.fcntl(pipe.fileno(), getattr(fcntl, "F_SETPIPE_SZ", 1031), PIPE_SIZE)
+        except OSError:
+            pass
+
     return process
 
 
+def write_frame(process: subprocess.Popen, data: bytes) -> None:
+    """Write a newline-terminated frame straight to the server's stdin pipe."""
+    fd = process.stdin.fileno()
+    view = memoryview(data)
+
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def read_frame(process: subprocess.Popen) -> bytes:
+    """Block until the next newline-terminated frame is on stdout and return it."""
+    fd = process.stdout.fileno()
+
+    newline = _stdout_buf.find(b"\n")
+    while newline < 0:
+        scanned = len(_stdout_buf)
+        chunk = os.read(fd, PIPE_READ_SIZE)
+        if not chunk:
+            raise EOFError("MCP server closed stdout")
+        _stdout_buf.extend(chunk)
+        newline = _stdout_buf.find(b"\n", scanned)
+
+    end = newline + 1
+    frame = bytes(_stdout_buf[: end - 1])
+    del _stdout_buf[:end]
+
+    return frame.rstrip(b"\r")
+
+
+def read_lines(process: subprocess.Popen) -> List[bytes]:
+    """Block for the next stdout frame, then drain frames already available.
+
+    Draining stops before BATCH_MAX_BYTES would be exceeded; anything past that
+    stays in the buffer for the next message, so a chatty server cannot stall the handler.
+    """
+    lines = [read_frame(process)]
+    size = len(lines[0]) + 1
+    fd = process.stdout.fileno()
+
+    while len(_stdout_buf) < BATCH_MAX_BYTES and select.select([fd], [], [], 0)[0]:
+        chunk = os.read(fd, PIPE_READ_SIZE)
+        if not chunk:
+            break
+        _stdout_buf.extend(chunk)
+
+    start = 0
+    while True:
+        newline = _stdout_buf.find(b"\n", start)
+        if newline < 0:
+            break
+        line = bytes(_stdout_buf[start:newline]).rstrip(b"\r")
+        if size + len(line) + 1 > BATCH_MAX_BYTES:
+            break
+        lines.append(line)
+        size += len(line) + 1
+        start = newline + 1
+    del _stdout_buf[:start]
+
+    return lines
+
+
+def get_s3() -> Any:
+    """Return the S3 client, reused across warm invocations."""
+    global _s3_client
+
+    if _s3_client is None:
+        _s3_client = boto3.client("s3", region_name=AWS_REGION)
+
+    return _s3_client
+
+
+def get_apigw(endpoint_url: str) -> Any:
+    """Return the API Gateway management client for an endpoint, reused across warm invocations."""
+    client = _apigw_clients.get(endpoint_url)
+    if client is None:
+        client = boto3.client("apigatewaymanagementapi", endpoint_url=endpoint_url)
+        _apigw_clients[endpoint_url] = client
+
+    return client
+
+
 def fetch_meta(mcp_name: str) -> Dict[str, Any]:
-    """Fetch MCP server metadata from S3."""
-    s3 = boto3.client("s3", region_name=AWS_REGION)
+    """Fetch MCP server metadata from S3, served from a short-lived cache when fresh."""
+    cached = _meta_cache.get(mcp_name)
+    if cached and time.monotonic() - cached[0] < META_TTL_SECONDS:
+        return cached[1]
+
+    s3 = get_s3()
     key = f"{mcp_name}.json"
 
     try:
         response = s3.get_object(Bucket=S3_BUCKET, Key=key)
-        return json.loads(response["Body"].read().decode("utf-8"))
+        metadata = json.loads(response["Body"].read().decode("utf-8"))
     except s3.exceptions.NoSuchKey:
         raise FileNotFoundError(f"MCP not found: {key}")
     except Exception as e:
         raise Exception(f"S3 error: {str(e)}")
 
+    _meta_cache[mcp_name] = (time.monotonic(), metadata)
+    _meta_cache.move_to_end(mcp_name)
+    if len(_meta_cache) > META_CACHE_SIZE:
+        _meta_cache.popitem(last=False)
+
+    return metadata
+
+
+def evict_cache() -> None:
+    """Remove least recently used cache entries while /tmp is over its budget."""
+    entries = []
+    for root in (MCP_CACHE_DIR, PIP_MODULES_DIR):
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                entries.append((os.path.getmtime(path), path))
+
+    for _, path in sorted(entries):
+        if shutil.disk_usage("/tmp").used <= TMP_LIMIT_BYTES:
+            break
+        print(f"Evicting cache entry: {path}")
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def repo_cache_dir(repo_url: str, mcp_name: str) -> str:
+    """Return the cache directory for an MCP repository."""
+    key = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MCP_CACHE_DIR, f"{mcp_name}_{key}")
+
+
+def repo_is_fresh(cache_dir: str) -> bool:
+    """Return whether a cached repo exists and is younger than REPO_CACHE_TTL_SECONDS."""
+    try:
+        age = time.time() - os.path.getmtime(os.path.join(cache_dir, ".done"))
+    except OSError:
+        return False
+
+    return age < REPO_CACHE_TTL_SECONDS
+
+
+def extract_zip(data: bytes, dest: str) -> None:
+    """Extract the runtime files of a ZIP archive using several threads."""
+    with zipfile.ZipFile(io.BytesIO(data), "r") as zf:
+        # Only top-level directories under the archive root are skipped; a nested
+        # package that happens to be named tests may be runtime code
+        members = []
+        for info in zf.infolist():
+            parts = info.filename.split("/")
+            if len(parts) > 2 and parts[1] in EXTRACT_SKIP_DIRS:
+                continue
+            members.append(info)
+
+    # Create directories up front so workers do not race on makedirs
+    files = []
+    for info in members:
+        parent = info.filename if info.is_dir() else os.path.dirname(info.filename)
+        path = os.path.normpath(os.path.join(dest, parent))
+        if path.startswith(dest + os.sep):
+            os.makedirs(path, exist_ok=True)
+        if not info.is_dir():
+            files.append(info.filename)
+
+    def extract(names: List[str]) -> None:
+        # ZipFile handles are not safe to share, so each worker opens its own
+        with zipfile.ZipFile(io.BytesIO(data), "r") as zf:
+            for name in names:
+                zf.extract(name, dest)
+
+    with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as executor:
+        list(executor.map(extract, [files[i::EXTRACT_WORKERS] for i in range(EXTRACT_WORKERS)]))
+
 
 def clone_repo(repo_url: str, mcp_name: str) -> str:
-    """Download GitHub repository as ZIP and extract."""
-    temp_dir = tempfile.mkdtemp(prefix=f"mcp_{mcp_name}_")
-    repo_dir = os.path.join(temp_dir, "repo")
+    """Download GitHub repository as ZIP and extract, reusing a fresh cached copy if present."""
+    cache_dir = repo_cache_dir(repo_url, mcp_name)
+    repo_dir = os.path.join(cache_dir, "repo")
+
+    if repo_is_fresh(cache_dir):
+        os.utime(cache_dir)
+        print(f"Using cached repo: {repo_dir}")
+        return repo_dir
+
+    evict_cache()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    # A per-repo dependency install may have been built from the stale tree
+    shutil.rmtree(os.path.join(PIP_MODULES_DIR, os.path.basename(cache_dir)), ignore_errors=True)
+    os.makedirs(cache_dir)
 
     try:
         if "github.com" not in repo_url:
@@ -242,52 +511,114 @@ def clone_repo(repo_url: str, mcp_name: str) -> str:
 
         repo_url = repo_url.rstrip("/").replace(".git", "")
         zip_url = f"{repo_url}/archive/refs/heads/main.zip"
-        zip_path = os.path.join(temp_dir, "repo.zip")
 
-        urllib.request.urlretrieve(zip_url, zip_path)
+        buf = io.BytesIO()
+        response = _http.request("GET", zip_url, preload_content=False)
+        try:
+            if response.status != 200:
+                # Read off the error body so the pooled connection can be reused
+                response.drain_conn()
+                raise Exception(f"HTTP {response.status} for {zip_url}")
+            shutil.copyfileobj(response, buf, length=1 << 20)
+        finally:
+            response.release_conn()
 
-        with zipfile.ZipFile(zip_path, "r") as zf:
-            zf.extractall(temp_dir)
+        extract_zip(buf.getvalue(), cache_dir)
 
-        folders = [f for f in os.listdir(temp_dir) if os.path.isdir(os.path.join(temp_dir, f))]
+        folders = [f for f in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, f))]
         if not folders:
             raise Exception("No folder in ZIP")
 
-        os.rename(os.path.join(temp_dir, folders[0]), repo_dir)
-        os.remove(zip_path)
+        os.rename(os.path.join(cache_dir, folders[0]), repo_dir)
+        open(os.path.join(cache_dir, ".done"), "w").close()
 
         return repo_dir
     except Exception as e:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
         raise Exception(f"Clone failed: {str(e)}")
 
 
-def install_deps(repo_dir: str) -> None:
-    """Install Python dependencies from requirements.txt."""
+def checkout_repo(repo_dir: str, mcp_name: str) -> str:
+    """Copy a cached repo into a fresh working directory for one server session."""
+    work_dir = os.path.join(tempfile.mkdtemp(prefix=f"mcp_{mcp_name}_"), "repo")
+    shutil.copytree(repo_dir, work_dir)
+
+    return work_dir
+
+
+def prewarm_pip() -> None:
+    """Create the pip target root and load pip once so the real install starts warm."""
+    os.makedirs(PIP_MODULES_DIR, exist_ok=True)
+
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pip", "--version"],
+            capture_output=True,
+            timeout=30,
+        )
+    except Exception as e:
+        print(f"Pip prewarm error: {e}")
+
+
+def install_deps(repo_dir: str) -> Optional[str]:
+    """Install Python dependencies from requirements.txt and return the install target."""
     req_file = os.path.join(repo_dir, "requirements.txt")
     if not os.path.exists(req_file):
-        return
+        return None
+
+    with open(req_file, "rb") as f:
+        requirements = f.read()
+
+    # Identical requirements share one install, unless they may pull in repo-local files
+    repo_local = b"file:" in requirements or any(
+        line.lstrip().startswith((b"-", b".", b"/")) for line in requirements.splitlines()
+    )
+    if repo_local:
+        key = os.path.basename(os.path.dirname(repo_dir))
+    else:
+        key = hashlib.sha256(requirements).hexdigest()[:16]
+
+    pip_target = f"{PIP_MODULES_DIR}/{key}"
+    sentinel = f"{pip_target}/.done"
+
+    if os.path.exists(sentinel):
+        os.utime(pip_target)
+        print(f"Using cached dependencies: {pip_target}")
+        return pip_target
 
-    pip_target = "/tmp/pip_modules"
     os.makedirs(pip_target, exist_ok=True)
 
-    if pip_target not in sys.path:
-        sys.path.insert(0, pip_target)
+    if UV_BINARY:
+        # uv resolves and downloads in parallel; provided by a Lambda layer in /opt/bin
+        command = [
+            UV_BINARY,
+            "pip",
+            "install",
+            "--python",
+            sys.executable,
+            "-r",
+            req_file,
+            "--target",
+            pip_target,
+            "--no-cache",
+        ]
+    else:
+        command = [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "-r",
+            req_file,
+            "--target",
+            pip_target,
+            "--upgrade",
+        ]
 
     print(f"Installing dependencies to {pip_target}")
     try:
         result = subprocess.run(
-            [
-                sys.executable,
-                "-m",
-                "pip",
-                "install",
-                "-r",
-                req_file,
-                "--target",
-                pip_target,
-                "--upgrade",
-            ],
+            command,
             capture_output=True,
             timeout=180,
             text=True,
@@ -297,7 +628,10 @@ def install_deps(repo_dir: str) -> None:
             print(f"Pip install failed (returncode={result.returncode})")
             print(f"Pip stderr: {result.stderr}")
         else:
+            open(sentinel, "w").close()
             print("Pip install successful")
 
     except Exception as e:
         print(f"Pip error: {e}")
+
+    return pip_target
@@ -26,6 +26,7 @@ module "lambda" {
   lambda_runtime     = var.lambda_runtime
   lambda_memory_size = var.lambda_memory_size
   lambda_timeout     = var.lambda_timeout
+  lambda_layers      = var.lambda_layers
   log_retention_days = var.log_retention_days
 }
 
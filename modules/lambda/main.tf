@@ -17,6 +17,7 @@ resource "aws_lambda_function" "mcp_executor" {
   filename      = "${path.module}/lambda_payload.zip"
   timeout       = var.lambda_timeout
   memory_size   = var.lambda_memory_size
+  layers        = var.lambda_layers
 
   source_code_hash = filebase64sha256("${path.module}/lambda_payload.zip")
 
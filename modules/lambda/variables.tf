@@ -36,6 +36,12 @@ variable "lambda_timeout" {
   default     = 60
 }
 
+variable "lambda_layers" {
+  description = "Lambda layer ARNs to attach (e.g. a layer providing the uv binary in /opt/bin)"
+  type        = list(string)
+  default     = []
+}
+
 variable "log_retention_days" {
   description = "CloudWatch log retention in days"
   type        = number